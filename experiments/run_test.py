@@ -1,4 +1,4 @@
-import os, json, time, sys
+import os, json, time, sys, argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -7,6 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
 
 import algorithms
 import cascade
+import profiling
 import utils
 
 sns.set_theme(style="white")
@@ -47,8 +48,9 @@ def run_greedy():
                 print(f"\n>>> Cost={cost_name}, f={f_name}, budget={budget} ({perc}%)")
 
                 start = time.time()
-                seed = algorithms.greedy_seed_set(G, budget, f_func, cost_func)
-                activated = cascade.majority_cascade(G, seed)
+                with profiling.phase("greedy"):
+                    seed = algorithms.greedy_seed_set(G, budget, f_func, cost_func)
+                    activated = cascade.majority_cascade(G, seed)
                 end = time.time()
 
                 diffusion_ratio = len(activated) / G.number_of_nodes()
@@ -62,6 +64,11 @@ def run_greedy():
                     "time": end - start,
                 })
 
+    # con la profilazione attiva i tempi sono falsati: si scrive solo il report
+    if profiling.enabled():
+        profiling.write_report(os.path.join(TABLES_DIR, "profile_greedy.json"))
+        return
+
     # Salva JSON in results/tables
     out_file = os.path.join(TABLES_DIR, "results.json")
     with open(out_file, "w") as f:
@@ -127,8 +134,9 @@ def run_wtss():
             print(f"\n>>> WTSS con cost={cost_name}, alpha={alpha}, budget={budget}")
 
             start = time.time()
-            seed = algorithms.WTSS(G, budget, cost_func)
-            activated = cascade.majority_cascade(G, seed)
+            with profiling.phase("WTSS"):
+                seed = algorithms.WTSS(G, budget, cost_func)
+                activated = cascade.majority_cascade(G, seed)
             end = time.time()
 
             diffusion_ratio = len(activated) / G.number_of_nodes()
@@ -143,6 +151,11 @@ def run_wtss():
                 "time": end - start,
             })
 
+    # con la profilazione attiva i tempi sono falsati: si scrive solo il report
+    if profiling.enabled():
+        profiling.write_report(os.path.join(TABLES_DIR, "profile_wtss.json"))
+        return
+
     # Salva JSON in results/tables
     out_file = os.path.join(TABLES_DIR, "results_wtss.json")
     with open(out_file, "w") as f:
@@ -203,8 +216,9 @@ def run_centrality():
             print(f"\n>>> Centrality con cost={cost_name}, alpha={alpha}, budget={budget}")
 
             start = time.time()
-            seed = algorithms.centrality_seed_set(G, budget, cost_func)
-            activated = cascade.majority_cascade(G, seed)
+            with profiling.phase("centrality"):
+                seed = algorithms.centrality_seed_set(G, budget, cost_func)
+                activated = cascade.majority_cascade(G, seed)
             end = time.time()
 
             diffusion_ratio = len(activated) / G.number_of_nodes()
@@ -219,6 +233,11 @@ def run_centrality():
                 "time": end - start,
             })
 
+    # con la profilazione attiva i tempi sono falsati: si scrive solo il report
+    if profiling.enabled():
+        profiling.write_report(os.path.join(TABLES_DIR, "profile_centrality.json"))
+        return
+
     # Scrittura JSON
     out_file = os.path.join(TABLES_DIR, "results_centrality.json")
     with open(out_file, "w") as f:
@@ -261,6 +280,17 @@ def plot_centrality_results():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true",
+                        help="riesegue gli esperimenti profilando memoria e allocazioni "
+                             "(report in results/tables/profile_*.json)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+        run_greedy()
+        run_wtss()
+        run_centrality()
+
    # run_greedy()
     plot_greedy_results()
    # run_wtss()
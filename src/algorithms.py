@@ -1,70 +1,117 @@
 import networkx as nx
+import numpy as np
 
-def greedy_seed_set(G, budget, f_func, cost_func):
+import profiling
+import threshold_engine
+import utils
+
+def greedy_seed_set(G, budget, f_func, cost_func, time_limit=None,
+                    checkpoint_path=None, checkpoint_every=60, thresholds=None,
+                    verbose=True):
     """
-    Algorithm 1 (Cost-Seeds-Greedy), generico per f1, f2, f3.
+    Algorithm 1 (Cost-Seeds-Greedy), generico per f1, f2, f3
+    o qualsiasi funzione obiettivo f(G, S, thresholds).
     Trova il seed set migliore per ogni funzione entro il budget.
 
     Parametri:
         G        : grafo
         budget   : intero, limite massimo
-        f_func   : funzione obiettivo (f1, f2, f3)
+        f_func   : funzione obiettivo (f1, f2, f3: guadagni vettoriali;
+                   altre funzioni vengono valutate candidato per candidato)
         cost_func: funzione di costo
+        time_limit      : secondi disponibili; allo scadere ritorna S_d
+                          (ultimo seed set ammissibile trovato). Ogni chiamata
+                          esegue comunque almeno un passo di selezione
+        checkpoint_path : file in cui salvare periodicamente S_p, S_d, costo
+                          e iterazione; se esiste, l'esecuzione riprende da lì
+        checkpoint_every: secondi tra due checkpoint
+        thresholds      : soglie per-nodo (default: maggioranza, vedi threshold_engine)
+        verbose         : stampa iterazione e costo ad ogni passo
 
     Funzionamento:
     - Mantiene S_p (ultimo valido) e S_d (corrente).
     - Finché non si sfora il budget:
-        * calcola Δ = f(S_d ∪ {v}) – f(S_d)
-        * seleziona v con Δ/costo massimo
-        * aggiorna S_p, S_d
+        * calcola Δ = f(S_d ∪ {v}) – f(S_d) per tutti i v insieme
+          (utils.marginal_gains, a partire dai contatori |N(u) ∩ S_d|)
+        * seleziona v ammissibile con Δ/costo massimo
+        * aggiorna S_p, S_d e i contatori dei vicini di v
     - Se il budget viene superato → ritorna S_p
+    I costi vengono valutati una sola volta per nodo all'inizio.
+
+    Output:
+        lista dei seed; con time_limit la coppia (seed, done), dove done=False
+        indica che la deadline è scaduta e il seed set è parziale
     """
 
     S_p, S_d = set(), set()
     cost_Sd = 0
-
-    # --- Precomputazione ---
-    degrees = dict(G.degree())
-    neighbors = {v: set(G.neighbors(v)) for v in G}
-
     iteration = 0
-    while True:
-        if cost_Sd > budget:
-            return list(S_p)
-
-        current_value = f_func(G, S_d, degrees, neighbors)
-        # current_value = valore attuale del seed set con la funzione scelta
-
-        best_node, best_score = None, float("-inf")
-
-        for v in G.nodes():
-            if v in S_d:
-                continue
-            c = cost_func(G, v)
-            if cost_Sd + c > budget:
-                continue
 
-            marginal = f_func(G, S_d | {v}, degrees, neighbors) - current_value
-            # marginal = guadagno marginale aggiungendo v
-            score = marginal / c if c > 0 else 0
-            # score = guadagno normalizzato per il costo
+    if thresholds is None:
+        thresholds = threshold_engine.compute_thresholds(G)
+    algorithm = f"greedy_{utils.func_name(f_func)}"
+    fingerprint = utils.run_fingerprint(G, cost_func, thresholds)
+    state = utils.load_checkpoint(checkpoint_path, algorithm, budget, fingerprint)
+    if state is not None:
+        S_p, S_d = state["S_p"], state["S_d"]
+        cost_Sd, iteration = state["cost"], state["iteration"]
+    ckpt = utils.Checkpointer(checkpoint_path, time_limit, checkpoint_every)
 
-            if score > best_score:
-                best_score, best_node = score, v
+    def current_state():
+        return {"algorithm": algorithm, "budget": budget, "fingerprint": fingerprint,
+                "S_p": S_p, "S_d": S_d, "cost": cost_Sd, "iteration": iteration}
 
-        if best_node is None:
-            return list(S_d)
-
-        # Aggiorna insiemi e costo
-        S_p = set(S_d)
-        S_d.add(best_node)
-        cost_Sd += cost_func(G, best_node)
-
-        print(f"Iterazione {iteration}, costo={cost_Sd}")
-        iteration += 1
-
-
-def WTSS(G, budget, cost_func):
+    # --- Precomputazione ---
+    with profiling.phase("precompute"):
+        cg = threshold_engine.compile_graph(G)
+        cost_values = [cost_func(G, v) for v in cg.nodes]  # valori esatti, per cost_Sd
+        costs = np.array(cost_values, dtype=np.float64)
+        counts = cg.neighbor_counts(S_d)  # |N(u) ∩ S_d| per ogni u
+        in_S = np.zeros(cg.n, dtype=bool)
+        in_S[[cg.index[v] for v in S_d]] = True
+
+    with profiling.phase("selection"):
+        while True:
+            if cost_Sd > budget:
+                ckpt.clear()
+                return ckpt.result(list(S_p), True)
+
+            if ckpt.expired():
+                # deadline: S_d rispetta il budget
+                ckpt.save(current_state())
+                return ckpt.result(list(S_d), False)
+            ckpt.maybe_save(current_state)
+
+            feasible = ~in_S & (cost_Sd + costs <= budget)
+            if not feasible.any():
+                ckpt.clear()
+                return ckpt.result(list(S_d), True)
+
+            # guadagno marginale di ogni nodo, normalizzato per il costo
+            gains = utils.marginal_gains(G, counts, f_func, thresholds, S_d, feasible, cg)
+            score = np.divide(gains, costs, out=np.zeros(cg.n), where=costs > 0)
+            score[~feasible] = -np.inf
+            # primo nodo (ordine di G.nodes()) col punteggio massimo, con tolleranza
+            # sugli arrotondamenti così i pareggi si risolvono come nella versione esatta
+            best = score.max()
+            i = int(np.argmax(score >= best - 1e-9 * max(1.0, abs(best))))
+            best_node = cg.nodes[i]
+
+            # Aggiorna insiemi, costo e contatori
+            S_p = set(S_d)
+            S_d.add(best_node)
+            in_S[i] = True
+            counts[cg.indices[cg.indptr[i]:cg.indptr[i + 1]]] += 1
+            cost_Sd += cost_values[i]
+
+            if verbose:
+                print(f"Iterazione {iteration}, costo={cost_Sd}")
+            iteration += 1
+            ckpt.step()
+
+
+def WTSS(G, budget, cost_func, time_limit=None,
+         checkpoint_path=None, checkpoint_every=60, thresholds=None):
     """
     Algorithm 2: Budget-constrained WTSS
     Trova un seed set massimale S con costo <= budget.
@@ -73,68 +120,100 @@ def WTSS(G, budget, cost_func):
         G        : grafo NetworkX
         budget   : intero (limite di costo)
         cost_func: funzione costo(G, v)
+        time_limit      : secondi disponibili; allo scadere ritorna S corrente
+                          (dopo almeno un passo di selezione per chiamata)
+        checkpoint_path : file in cui salvare periodicamente lo stato
+                          (S, U, delta, k, N, costo); se esiste si riprende da lì
+        checkpoint_every: secondi tra due checkpoint
+        thresholds      : soglie per-nodo (default: maggioranza, vedi threshold_engine)
 
     Output:
-        S : insieme di nodi scelti
+        S : insieme di nodi scelti; con time_limit la coppia (S, done), dove
+            done=False indica che la deadline è scaduta e S è parziale
     """
-    S = set() # seed set
-    U = set(G.nodes()) # nodi non ancora processati
-
-    # Inizializzazione
-    delta = {v: G.degree(v) for v in U}  # gradi correnti
-    k = {v: (G.degree(v) + 1) // 2 for v in U}  # soglia di attivazione
-    N = {v: set(G.neighbors(v)) for v in U} # vicini correnti di ogni nodo
-    total_cost = 0 # costo totale del seed set
-
-    while U and total_cost <= budget: # finché ci sono nodi e budget
-        node = None # nodo selezionato in questa iterazione
-
-        # Case 1: nodo già attivabile
-        node = next((v for v in U if k[v] == 0), None)
-        if node:
-            for u in N[node]:
-                if u in U:
-                    k[u] = max(0, k[u] - 1)
-
-        # Case 2: nodo che non può essere attivato dai vicini
-        elif any(delta[v] < k[v] for v in U):
-            for v in U:
-                if delta[v] < k[v]:
-                    c = cost_func(G, v)
-                    if total_cost + c <= budget:
-                        node = v
-                        S.add(v)
-                        total_cost += c
-                        for u in N[v]:
-                            if u in U:
-                                k[u] = max(0, k[u] - 1)
-                        break
-
-        # Case 3: scegli nodo con rapporto migliore
+    with profiling.phase("init"):
+        if thresholds is None:
+            thresholds = threshold_engine.compute_thresholds(G)
+        fingerprint = utils.run_fingerprint(G, cost_func, thresholds)
+        state = utils.load_checkpoint(checkpoint_path, "WTSS", budget, fingerprint)
+        if state is not None:
+            S, U = state["S"], state["U"]
+            delta, k, N = state["delta"], state["k"], state["N"]
+            total_cost = state["cost"]
         else:
-            best_val = -1
-            for v in U:
-                if delta[v] > 0:
-                    c = cost_func(G, v)
-                    if total_cost + c <= budget:
-                        val = (c * k[v]) / (delta[v] * (delta[v] + 1))
-                        if val > best_val:
-                            best_val, node = val, v
-
-        if node is None:
-            break  # nessun nodo valido
-
-        # Aggiorna delta e vicini
-        for u in N[node].copy():
-            if u in U:
-                delta[u] -= 1
-                N[u].discard(node)
+            S = set() # seed set
+            U = set(G.nodes()) # nodi non ancora processati
+
+            # Inizializzazione
+            delta = {v: G.degree(v) for v in U}  # gradi correnti
+            index = threshold_engine.compile_graph(G).index
+            k = {v: int(thresholds[index[v]]) for v in U}  # soglia di attivazione
+            N = {v: set(G.neighbors(v)) for v in U} # vicini correnti di ogni nodo
+            total_cost = 0 # costo totale del seed set
+    ckpt = utils.Checkpointer(checkpoint_path, time_limit, checkpoint_every)
+
+    def current_state():
+        return {"algorithm": "WTSS", "budget": budget, "fingerprint": fingerprint, "S": S, "U": U,
+                "delta": delta, "k": k, "N": N, "cost": total_cost}
+
+    with profiling.phase("selection"):
+        while U and total_cost <= budget: # finché ci sono nodi e budget
+            if ckpt.expired():
+                # deadline: S rispetta il budget, si salva per riprendere
+                ckpt.save(current_state())
+                return ckpt.result(S, False)
+            ckpt.maybe_save(current_state)
+
+            node = None # nodo selezionato in questa iterazione
+
+            # Case 1: nodo già attivabile
+            node = next((v for v in U if k[v] == 0), None)
+            if node:
+                for u in N[node]:
+                    if u in U:
+                        k[u] = max(0, k[u] - 1)
+
+            # Case 2: nodo che non può essere attivato dai vicini
+            elif any(delta[v] < k[v] for v in U):
+                for v in U:
+                    if delta[v] < k[v]:
+                        c = cost_func(G, v)
+                        if total_cost + c <= budget:
+                            node = v
+                            S.add(v)
+                            total_cost += c
+                            for u in N[v]:
+                                if u in U:
+                                    k[u] = max(0, k[u] - 1)
+                            break
+
+            # Case 3: scegli nodo con rapporto migliore
+            else:
+                best_val = -1
+                for v in U:
+                    if delta[v] > 0:
+                        c = cost_func(G, v)
+                        if total_cost + c <= budget:
+                            val = (c * k[v]) / (delta[v] * (delta[v] + 1))
+                            if val > best_val:
+                                best_val, node = val, v
+
+            if node is None:
+                break  # nessun nodo valido
+
+            # Aggiorna delta e vicini
+            for u in N[node].copy():
+                if u in U:
+                    delta[u] -= 1
+                    N[u].discard(node)
 
-        U.remove(node)
+            U.remove(node)
+            ckpt.step()
 
-    return S
+        ckpt.clear()
+        return ckpt.result(S, True)
 
-def centrality_seed_set(G, budget, cost_func):
+def centrality_seed_set(G, budget, cost_func, centrality=None):
     """
     Algorithm 3 - Centrality-based heuristic.
     Seleziona nodi con massima betweenness centrality normalizzata sul costo.
@@ -143,28 +222,32 @@ def centrality_seed_set(G, budget, cost_func):
         G        : grafo
         budget   : intero, limite massimo
         cost_func: funzione di costo (uniform, degree, random, threshold)
+        centrality: betweenness già calcolata (opzionale, evita di ricalcolarla)
 
     Output:
         seed set (lista di nodi)
     """
 
     # Calcola la betweenness centrality (valori tra 0 e 1)
-    centrality = nx.betweenness_centrality(G)
-
-    # Ordina i nodi in base a centrality / costo
-    ranking = sorted(
-        G.nodes(),
-        key=lambda v: centrality[v] / max(1, cost_func(G, v)),
-        reverse=True
-    )
-
-    seed = []
-    total_cost = 0
-
-    for v in ranking:
-        c = cost_func(G, v)
-        if total_cost + c <= budget:
-            seed.append(v)
-            total_cost += c
+    with profiling.phase("betweenness"):
+        if centrality is None:
+            centrality = nx.betweenness_centrality(G)
+
+    with profiling.phase("selection"):
+        # Ordina i nodi in base a centrality / costo
+        ranking = sorted(
+            G.nodes(),
+            key=lambda v: centrality[v] / max(1, cost_func(G, v)),
+            reverse=True
+        )
+
+        seed = []
+        total_cost = 0
+
+        for v in ranking:
+            c = cost_func(G, v)
+            if total_cost + c <= budget:
+                seed.append(v)
+                total_cost += c
 
     return seed
\ No newline at end of file
@@ -1,26 +1,21 @@
+import profiling
+import threshold_engine
+
+
 def majority_cascade(G, seed_set):
     """
     Majority Cascade:
     - Un nodo si attiva se i vicini attivi >= ceil(deg/2).
     - Una volta attivo rimane attivo.
     """
-    active = set(seed_set)
-    changed = True
-
-    while changed:
-        changed = False
-        new_active = set()
+    with profiling.phase("cascade"):
+        return threshold_engine.propagate(G, seed_set, threshold_engine.compute_thresholds(G))
 
-        for v in G.nodes():
-            if v not in active:
-                neighbors = list(G.neighbors(v))
-                if neighbors:
-                    active_neighbors = sum(1 for n in neighbors if n in active)
-                    if active_neighbors >= len(neighbors) / 2:
-                        new_active.add(v)
 
-        if new_active:
-            active |= new_active
-            changed = True
-
-    return active
+def threshold_cascade(G, seed_set, thresholds):
+    """
+    Cascade con soglie per-nodo arbitrarie
+    (array allineato a threshold_engine.compile_graph(G).nodes).
+    """
+    with profiling.phase("cascade"):
+        return threshold_engine.propagate(G, seed_set, thresholds)
@@ -0,0 +1,135 @@
+"""
+Profilazione di memoria e allocazioni (basata su tracemalloc).
+
+Quando è attiva, ogni blocco `with profiling.phase("nome")` registra:
+    - tempo di esecuzione
+    - picco di memoria rispetto all'inizio della fase
+    - byte e blocchi allocati ancora vivi a fine fase (net)
+    - principali siti di allocazione (file:riga)
+Le fasi annidate hanno nome "esterna/interna"; chiamate ripetute della stessa
+fase vengono aggregate. Se la profilazione non è attiva, phase() non fa nulla.
+
+Uso:
+    profiling.enable()
+    with profiling.phase("greedy"):
+        algorithms.greedy_seed_set(...)   # registra greedy/precompute, greedy/selection
+    profiling.write_report("results/tables/profile_greedy.json")
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_enabled = False
+_top = 10
+_stack = []     # fasi aperte: [nome, snapshot, memoria iniziale, picco, t0]
+_phases = {}    # nome completo -> statistiche aggregate
+
+# siti di allocazione da ignorare; si scartano dal diff invece di filtrare
+# lo snapshot, che richiederebbe un passaggio Python su tutte le tracce
+_IGNORED = {tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>"}
+
+
+def enable(top=10, frames=1):
+    """Attiva la profilazione; top = numero di siti di allocazione nel report."""
+    global _enabled, _top
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _enabled, _top = True, top
+    reset()
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    tracemalloc.stop()
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    """Svuota le statistiche raccolte (es. dopo aver scritto un report)."""
+    _phases.clear()
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot()
+
+
+def phase(name):
+    """Context manager che profila il blocco come fase `name`."""
+    if not _enabled:
+        return nullcontext()
+    return _phase(name)
+
+
+@contextmanager
+def _phase(name):
+    # il picco dell'eventuale fase esterna va conservato prima del reset
+    current, peak = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1][3] = max(_stack[-1][3], peak)
+    tracemalloc.reset_peak()
+
+    full_name = "/".join([entry[0] for entry in _stack] + [name])
+    _stack.append([name, _snapshot(), current, current, time.perf_counter()])
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - _stack[-1][4]
+        current, peak = tracemalloc.get_traced_memory()
+        _, before, start, phase_peak, _ = _stack.pop()
+        phase_peak = max(phase_peak, peak)
+        diff = _snapshot().compare_to(before, "lineno")
+        if _stack:
+            _stack[-1][3] = max(_stack[-1][3], phase_peak)
+        tracemalloc.reset_peak()
+        _record(full_name, elapsed, phase_peak - start, current - start, diff)
+
+
+def _record(name, elapsed, peak, net, diff):
+    stats = _phases.setdefault(name, {
+        "calls": 0, "time": 0.0, "peak_bytes": 0,
+        "net_bytes": 0, "net_blocks": 0, "sites": {},
+    })
+    stats["calls"] += 1
+    stats["time"] += elapsed
+    stats["peak_bytes"] = max(stats["peak_bytes"], peak)
+    stats["net_bytes"] += net
+
+    for d in diff:
+        frame = d.traceback[0]
+        if (d.size_diff == 0 and d.count_diff == 0) or frame.filename in _IGNORED:
+            continue
+        stats["net_blocks"] += d.count_diff
+        site = stats["sites"].setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+        site[0] += d.size_diff
+        site[1] += d.count_diff
+
+
+def report():
+    """Statistiche per fase, con i siti di allocazione principali per dimensione."""
+    out = {}
+    for name, stats in _phases.items():
+        sites = sorted(stats["sites"].items(), key=lambda s: abs(s[1][0]), reverse=True)
+        out[name] = dict(
+            {k: v for k, v in stats.items() if k != "sites"},
+            top_sites=[
+                {"site": site, "size_bytes": size, "blocks": count}
+                for site, (size, count) in sites[:_top]
+            ],
+        )
+    return out
+
+
+def write_report(path):
+    """Scrive il report JSON in path e azzera le statistiche."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"phases": report()}, f, indent=2)
+    print(f"Report di profilazione salvato in {path}")
+    reset()
@@ -0,0 +1,375 @@
+"""
+Servizio locale di interrogazione (asyncio, HTTP su localhost o Unix socket).
+
+Tiene i grafi caricati in memoria una sola volta e risponde a richieste JSON:
+
+    POST /seed     {"graph": "ca-GrQc", "algorithm": "greedy", "cost": "uniform",
+                    "budget": 50, "f": "f1"}            (oppure "alpha" al posto di "budget")
+    POST /cascade  {"graph": "ca-GrQc", "seeds": [21012, 21281, 22691]}
+    GET  /stats    latenze p50/p99 e throughput (richieste riuscite), errori, hit della cache
+    GET  /graphs   grafi disponibili
+
+Il lavoro CPU-bound gira in un pool di processi: ogni worker carica i grafi
+all'avvio e riceve la betweenness, calcolata una sola volta dal processo
+principale. I risultati finiscono in una cache LRU limitata. Il server ascolta solo su 127.0.0.1: nessun accesso di rete.
+
+Uso:
+    python src/service.py --port 8765 --workers 4
+    python src/service.py --graph ca-GrQc=data/ca-GrQc.txt --unix /tmp/majority.sock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import networkx as nx
+
+sys.path.append(os.path.dirname(__file__))
+
+import algorithms
+import cascade
+import utils
+
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..")
+DEFAULT_GRAPHS = {"ca-GrQc": os.path.join(BASE_DIR, "data", "ca-GrQc.txt")}
+
+COST_FUNCTIONS = {
+    "uniform": utils.cost_uniform,
+    "random": utils.cost_random,
+    "threshold": utils.cost_threshold,
+}
+
+F_FUNCTIONS = {
+    "f1": utils.f1,
+    "f2": utils.f2,
+    "f3": utils.f3,
+}
+
+ALGORITHMS = ("greedy", "wtss", "centrality")
+
+
+# --- Stato dei worker (uno per processo) ---
+
+_GRAPHS = {}
+_CENTRALITY = {}
+
+
+def _load_graph(path):
+    return nx.read_edgelist(path, comments="#", nodetype=int, create_using=nx.Graph)
+
+
+def _init_worker(graph_paths, centrality):
+    """Carica i grafi una sola volta per processo worker."""
+    for name, path in graph_paths.items():
+        _GRAPHS[name] = _load_graph(path)
+    _CENTRALITY.update(centrality)
+
+
+def _seed_task(graph, algorithm, cost, budget, f):
+    G = _GRAPHS[graph]
+    cost_func = COST_FUNCTIONS[cost]
+
+    if algorithm == "greedy":
+        seed = algorithms.greedy_seed_set(G, budget, F_FUNCTIONS[f], cost_func, verbose=False)
+    elif algorithm == "wtss":
+        seed = algorithms.WTSS(G, budget, cost_func)
+    else:
+        seed = algorithms.centrality_seed_set(G, budget, cost_func, _CENTRALITY[graph])
+
+    activated = cascade.majority_cascade(G, seed)
+    return {
+        "seeds": sorted(seed),
+        "k": len(seed),
+        "activated": len(activated),
+        "diffusion_ratio": len(activated) / G.number_of_nodes(),
+    }
+
+
+def _cascade_task(graph, seeds):
+    G = _GRAPHS[graph]
+    activated = cascade.majority_cascade(G, [v for v in seeds if v in G])
+    return {
+        "activated": len(activated),
+        "diffusion_ratio": len(activated) / G.number_of_nodes(),
+    }
+
+
+# --- Cache e metriche (processo principale) ---
+
+class WorkerError(Exception):
+    """Errore durante l'esecuzione di un task nel pool di worker."""
+
+
+class LRUCache:
+    """Cache LRU limitata a maxsize elementi."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+
+class LatencyStats:
+    """
+    Latenze delle ultime `window` richieste riuscite e throughput dall'avvio.
+    Le richieste fallite (400/500) sono contate a parte e non entrano nelle latenze.
+    """
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+        self.count += 1
+
+    def record_error(self):
+        self.errors += 1
+
+    def summary(self):
+        vals = sorted(self.latencies)
+        elapsed = time.perf_counter() - self.start
+        return {
+            "requests": self.count,
+            "errors": self.errors,
+            "p50_ms": _percentile(vals, 50) * 1000,
+            "p99_ms": _percentile(vals, 99) * 1000,
+            "throughput_rps": self.count / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class QueryService:
+
+    def __init__(self, graph_paths, workers=None, cache_size=1024):
+        self.graph_paths = graph_paths
+        # copia locale per budget e /graphs; i worker hanno la propria
+        self.graphs = {name: _load_graph(path) for name, path in graph_paths.items()}
+        # betweenness calcolata una volta qui e passata ai worker
+        self.centrality = {}
+        for name, G in self.graphs.items():
+            print(f"Calcolo betweenness per {name}...")
+            self.centrality[name] = nx.betweenness_centrality(G)
+        self.workers = workers
+        self.pool = self._new_pool()
+        self.cache = LRUCache(cache_size)
+        self.stats = LatencyStats()
+
+    def _check_graph(self, req):
+        graph = req.get("graph", next(iter(self.graph_paths)))
+        if graph not in self.graph_paths:
+            raise ValueError(f"Grafo non disponibile: {graph}")
+        return graph
+
+    async def seed(self, req):
+        graph = self._check_graph(req)
+        algorithm = req.get("algorithm", "greedy")
+        cost = req.get("cost", "uniform")
+        f = req.get("f", "f1")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algoritmo non riconosciuto: {algorithm}")
+        if cost not in COST_FUNCTIONS:
+            raise ValueError(f"Funzione di costo non riconosciuta: {cost}")
+        if algorithm == "greedy" and f not in F_FUNCTIONS:
+            raise ValueError(f"Funzione obiettivo non riconosciuta: {f}")
+
+        if "budget" in req:
+            budget = int(req["budget"])
+        else:
+            G = self.graphs[graph]
+            budget = utils.compute_budget(G, COST_FUNCTIONS[cost], float(req.get("alpha", 0.01)))
+
+        key = ("seed", graph, algorithm, cost, budget, f if algorithm == "greedy" else None)
+        # con costi random il risultato non è riproducibile: niente cache
+        cacheable = cost != "random"
+        if cacheable:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return dict(hit, budget=budget, cached=True)
+
+        result = await self._run(_seed_task, graph, algorithm, cost, budget, f)
+        if cacheable:
+            self.cache.put(key, result)
+        return dict(result, budget=budget, cached=False)
+
+    async def cascade(self, req):
+        graph = self._check_graph(req)
+        seeds = req.get("seeds", [])
+        if not isinstance(seeds, list):
+            raise ValueError("'seeds' deve essere una lista di nodi")
+        seeds = sorted(set(seeds))
+        key = ("cascade", graph, tuple(seeds))
+        hit = self.cache.get(key)
+        if hit is not None:
+            return dict(hit, cached=True)
+
+        result = await self._run(_cascade_task, graph, seeds)
+        self.cache.put(key, result)
+        return dict(result, cached=False)
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self.graph_paths, self.centrality),
+        )
+
+    async def _run(self, task, *args):
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, task, *args)
+        except BrokenProcessPool as e:
+            # un worker è morto (es. OOM): il pool non accetta più task e va
+            # ricreato, una sola volta anche se più richieste falliscono insieme
+            if self.pool is pool:
+                pool.shutdown(wait=False)
+                self.pool = self._new_pool()
+            raise WorkerError(f"{type(e).__name__}: {e}") from e
+        except Exception as e:
+            raise WorkerError(f"{type(e).__name__}: {e}") from e
+
+    def info(self):
+        return {
+            name: {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+            for name, G in self.graphs.items()
+        }
+
+    def summary(self):
+        return dict(
+            self.stats.summary(),
+            cache_size=len(self.cache.data),
+            cache_hits=self.cache.hits,
+            cache_misses=self.cache.misses,
+        )
+
+    async def dispatch(self, method, path, body):
+        if method == "GET" and path == "/stats":
+            return 200, self.summary()
+        if method == "GET" and path == "/graphs":
+            return 200, self.info()
+        if method == "POST" and path in ("/seed", "/cascade"):
+            try:
+                req = json.loads(body or b"{}")
+                if not isinstance(req, dict):
+                    raise ValueError("Il corpo della richiesta deve essere un oggetto JSON")
+                if path == "/seed":
+                    return 200, await self.seed(req)
+                return 200, await self.cascade(req)
+            except WorkerError as e:
+                return 500, {"error": str(e)}
+            except (ValueError, TypeError) as e:
+                return 400, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": f"{type(e).__name__}: {e}"}
+        return 404, {"error": f"{method} {path} non trovato"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                start = time.perf_counter()
+                status, payload = await self.dispatch(method, path, body)
+                if path in ("/seed", "/cascade"):
+                    if status == 200:
+                        self.stats.record(time.perf_counter() - start)
+                    else:
+                        self.stats.record_error()
+
+                data = json.dumps(payload).encode()
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                          500: "Internal Server Error"}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown()
+
+
+async def serve(service, port=8765, unix=None):
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+        print(f"Servizio in ascolto su {unix}")
+    else:
+        server = await asyncio.start_server(service.handle, host="127.0.0.1", port=port)
+        print(f"Servizio in ascolto su http://127.0.0.1:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servizio locale seed set / cascade")
+    parser.add_argument("--graph", action="append", default=[],
+                        help="nome=percorso di un edgelist (ripetibile)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="percorso Unix socket (al posto di TCP)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    graph_paths = dict(g.split("=", 1) for g in args.graph) or DEFAULT_GRAPHS
+    service = QueryService(graph_paths, workers=args.workers, cache_size=args.cache_size)
+    print(f"Grafi caricati: {service.info()}")
+    try:
+        asyncio.run(serve(service, port=args.port, unix=args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Motore di propagazione a soglia per-nodo.
+
+Il grafo viene "compilato" una sola volta in formato CSR (array numpy) e le
+soglie sono un array allineato all'ordine dei nodi. Cascade, WTSS e funzioni
+obiettivo usano lo stesso array, calcolato una volta per grafo.
+
+Regole disponibili (d = grado del nodo):
+    "majority" : ceil(d/2)        (modello usato nel progetto)
+    "strict"   : floor(d/2) + 1   (maggioranza stretta)
+    "fraction" : ceil(q*d)        (frazione q dei vicini, calcolata in aritmetica esatta)
+    "custom"   : dict {v: soglia} oppure funzione soglia(G, v)
+"""
+
+import weakref
+from fractions import Fraction
+
+import numpy as np
+
+import profiling
+
+# grafo -> CompiledGraph; la chiave è l'oggetto grafo, quindi le copie
+# (G.copy()) non condividono la cache
+_COMPILED = weakref.WeakKeyDictionary()
+
+
+class CompiledGraph:
+    """
+    Rappresentazione CSR di un grafo NetworkX.
+
+    Attributi:
+        nodes  : lista dei nodi (l'indice i corrisponde a nodes[i])
+        index  : dict nodo -> indice
+        indptr, indices : adiacenza CSR (i vicini di i sono indices[indptr[i]:indptr[i+1]])
+        degree : grado NetworkX di ogni nodo (i self-loop contano 2)
+        rows   : per ogni arco in indices, l'indice del nodo di partenza
+    """
+
+    def __init__(self, G):
+        self.nodes = list(G.nodes())
+        self.index = {v: i for i, v in enumerate(self.nodes)}
+        n = len(self.nodes)
+
+        lengths = np.fromiter((len(G.adj[v]) for v in self.nodes), dtype=np.int64, count=n)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.indices = np.fromiter(
+            (self.index[u] for v in self.nodes for u in G.adj[v]),
+            dtype=np.int64, count=int(self.indptr[-1]),
+        )
+        self.rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        self.degree = np.fromiter((d for _, d in G.degree(self.nodes)), dtype=np.int64, count=n)
+        self.n = n
+        self.m = G.number_of_edges()
+        self.thresholds = {}  # cache delle soglie per regola
+
+    def gather(self, idx):
+        """Concatena i vicini dei nodi in idx (array di indici)."""
+        starts = self.indptr[idx]
+        lengths = self.indptr[idx + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.indices[offsets + np.arange(total)]
+
+    def neighbor_counts(self, S):
+        """|N(v) ∩ S| per ogni nodo, come array."""
+        mask = np.zeros(self.n, dtype=np.int64)
+        mask[[self.index[v] for v in S if v in self.index]] = 1
+        return np.bincount(self.rows, weights=mask[self.indices], minlength=self.n).astype(np.int64)
+
+
+def compile_graph(G):
+    """
+    Ritorna la versione CSR di G, calcolata una sola volta per grafo.
+    Viene ricompilata se cambia il numero di nodi o di archi; modifiche che
+    li lasciano invariati (es. un arco spostato) richiedono invalidate(G).
+    Il controllo costa O(n) (G.number_of_edges()): nei cicli si conserva il
+    CompiledGraph ritornato invece di richiamare compile_graph ad ogni passo.
+    """
+    cg = _COMPILED.get(G)
+    if cg is None or cg.n != G.number_of_nodes() or cg.m != G.number_of_edges():
+        with profiling.phase("compile"):
+            cg = CompiledGraph(G)
+        _COMPILED[G] = cg
+    return cg
+
+
+def invalidate(G):
+    """Scarta la versione compilata di G (da chiamare dopo averlo modificato)."""
+    _COMPILED.pop(G, None)
+
+
+def majority_rule(d):
+    """Soglia di maggioranza ceil(d/2); d può essere un intero o un array di gradi."""
+    return (d + 1) // 2
+
+
+def compute_thresholds(G, rule="majority", q=None, custom=None):
+    """
+    Array delle soglie per-nodo, allineato a compile_graph(G).nodes.
+    Le regole predefinite sono calcolate una volta per grafo e messe in cache.
+    """
+    cg = compile_graph(G)
+    d = cg.degree
+
+    if rule == "custom":
+        if custom is None:
+            raise ValueError("La regola 'custom' richiede il parametro custom")
+        if callable(custom):
+            values = (custom(G, v) for v in cg.nodes)
+        else:
+            values = (custom[v] for v in cg.nodes)
+        return np.fromiter(values, dtype=np.int64, count=cg.n)
+
+    key = (rule, q)
+    if key in cg.thresholds:
+        return cg.thresholds[key]
+
+    if rule == "majority":
+        t = majority_rule(d)
+    elif rule == "strict":
+        t = d // 2 + 1
+    elif rule == "fraction":
+        if q is None or not 0 < q <= 1:
+            raise ValueError(f"La regola 'fraction' richiede 0 < q <= 1, ricevuto q={q}")
+        # ceil intero su q razionale: np.ceil(q * d) sbaglia per arrotondamento
+        # (0.55 * 100 = 55.00000000000001 -> 56); str(q) è il valore decimale di q
+        frac = Fraction(str(q))
+        t = -(-frac.numerator * d // frac.denominator)
+    else:
+        raise ValueError(f"Regola di soglia non riconosciuta: {rule}")
+
+    t.setflags(write=False)
+    cg.thresholds[key] = t
+    return t
+
+
+def propagate(G, seed_set, thresholds=None, cg=None):
+    """
+    Propagazione a soglia sincrona:
+    - un nodo con almeno un vicino si attiva se i vicini attivi >= soglia;
+    - una volta attivo rimane attivo.
+    Ad ogni round si aggiornano i contatori solo per i vicini dei nuovi attivi.
+    cg: grafo già compilato (evita il controllo di compile_graph in chiamate ripetute).
+    """
+    if cg is None:
+        cg = compile_graph(G)
+    if thresholds is None:
+        thresholds = compute_thresholds(G)
+
+    seeds = set(seed_set)
+    active = np.zeros(cg.n, dtype=bool)
+    frontier = np.fromiter((cg.index[v] for v in seeds if v in cg.index), dtype=np.int64)
+    active[frontier] = True
+
+    counts = np.zeros(cg.n, dtype=np.int64)
+    can_activate = cg.indptr[1:] > cg.indptr[:-1]  # nodi con almeno un vicino
+
+    while True:
+        if frontier.size:
+            counts += np.bincount(cg.gather(frontier), minlength=cg.n)
+        # al primo round entrano anche i nodi con soglia 0, pure senza seed
+        new = ~active & can_activate & (counts >= thresholds)
+        if not new.any():
+            break
+        active |= new
+        frontier = np.flatnonzero(new)
+
+    return seeds | {cg.nodes[i] for i in np.flatnonzero(active)}
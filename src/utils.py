@@ -1,9 +1,14 @@
+import hashlib
 import networkx as nx
 import os
-from math import ceil
+import pickle
+import time
 import random
-import math
-from typing import Set, Dict
+from typing import Set
+
+import numpy as np
+
+import threshold_engine
 
 
 def load_ca_grqc():
@@ -13,6 +18,114 @@ def load_ca_grqc():
     path = os.path.join("data", "ca-GrQc.txt")
     return nx.read_edgelist(path, comments="#", nodetype=int, create_using=nx.Graph)
 
+def save_checkpoint(path, state):
+    """
+    Salva lo stato interno di un algoritmo su disco (pickle).
+    Scrive su un file temporaneo e poi lo rinomina, così un'interruzione
+    durante la scrittura non corrompe il checkpoint precedente.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp, path)
+
+
+def func_name(func):
+    """Nome di una funzione, anche se avvolta in functools.partial."""
+    while not hasattr(func, "__name__") and hasattr(func, "func"):
+        func = func.func
+    return getattr(func, "__name__", type(func).__name__)
+
+
+def run_fingerprint(G, cost_func, thresholds):
+    """
+    Identifica l'input di un'esecuzione: grafo (n, m, hash della lista dei nodi),
+    funzione di costo e soglie (hash dell'array, quindi anche la regola usata).
+    """
+    nodes = hashlib.sha1(repr(list(G.nodes())).encode()).hexdigest()
+    t = hashlib.sha1(np.ascontiguousarray(thresholds, dtype=np.int64).tobytes()).hexdigest()
+    return {
+        "n": G.number_of_nodes(),
+        "m": G.number_of_edges(),
+        "nodes": nodes,
+        "cost": func_name(cost_func),
+        "thresholds": t,
+    }
+
+
+def load_checkpoint(path, algorithm, budget, fingerprint):
+    """
+    Carica un checkpoint se esiste, altrimenti ritorna None.
+    Solleva ValueError se il checkpoint appartiene a un'altra esecuzione
+    (algoritmo, budget o fingerprint diversi, vedi run_fingerprint).
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("algorithm") != algorithm or state.get("budget") != budget:
+        raise ValueError(
+            f"Checkpoint {path} non compatibile: "
+            f"{state.get('algorithm')}/{state.get('budget')} invece di {algorithm}/{budget}"
+        )
+    saved = state.get("fingerprint") or {}
+    diff = sorted(k for k in fingerprint if saved.get(k) != fingerprint[k])
+    if diff:
+        raise ValueError(
+            f"Checkpoint {path} salvato su un input diverso (differiscono: {', '.join(diff)})"
+        )
+    return state
+
+
+class Checkpointer:
+    """
+    Gestisce deadline e checkpoint periodici di un algoritmo.
+
+    Parametri:
+        path      : file di checkpoint (None = nessun checkpoint)
+        time_limit: secondi di wall-clock disponibili (None = nessun limite)
+        every     : intervallo minimo in secondi tra due checkpoint
+
+    La deadline vale solo dopo almeno un passo (step()) nella chiamata corrente:
+    anche con finestre più corte del caricamento ogni ripresa fa progressi.
+    Con time_limit, result() ritorna (seeds, done): done=False indica che la
+    deadline è scaduta e seeds è un risultato parziale.
+    """
+
+    def __init__(self, path=None, time_limit=None, every=60):
+        self.path = path
+        self.every = every
+        self.steps = 0
+        now = time.monotonic()
+        self.deadline = now + time_limit if time_limit is not None else None
+        self.last_save = now
+
+    def step(self):
+        self.steps += 1
+
+    def expired(self):
+        return (self.deadline is not None and self.steps > 0
+                and time.monotonic() >= self.deadline)
+
+    def maybe_save(self, state_func):
+        """Salva state_func() se è passato almeno `every` dall'ultimo checkpoint."""
+        if self.path is not None and time.monotonic() - self.last_save >= self.every:
+            self.save(state_func())
+
+    def save(self, state):
+        if self.path is not None:
+            save_checkpoint(self.path, state)
+            self.last_save = time.monotonic()
+
+    def clear(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def result(self, seeds, done):
+        """(seeds, done) se è stato dato un time_limit, altrimenti solo seeds."""
+        return (seeds, done) if self.deadline is not None else seeds
+
+
 def cost_uniform(G,v):
     """
     Ogni nodo ha costo 1.
@@ -23,7 +136,7 @@ def cost_uniform(G,v):
 
 def cost_threshold(G, v):
     """Costo = soglia di maggioranza """
-    return (G.degree(v) + 1) // 2  # ceil
+    return threshold_engine.majority_rule(G.degree(v))
 
 
 def cost_random(G,v,low=1, high=10):
@@ -44,7 +157,7 @@ def compute_budget(G, cost_func, alpha=0.01, low=1, high=10):
         return int(alpha * G.number_of_nodes())
 
     elif cost_func.__name__ == "cost_threshold":
-        total = sum((deg + 1) // 2 for _, deg in G.degree())
+        total = int(threshold_engine.compute_thresholds(G).sum())
         return int(alpha * total)
 
     elif cost_func.__name__ == "cost_random":
@@ -60,72 +173,96 @@ def compute_budget(G, cost_func, alpha=0.01, low=1, high=10):
 #  ma non è garantito che quella col valore più alto, attivi
 #  più nodi. 
 
-def majority_threshold(deg: int) -> int:
-    return ceil(deg / 2)
+def f1(G: nx.Graph, S: Set[int], thresholds: np.ndarray = None) -> float:
+    """
+    f1(S) = sum_v min(|N(v) ∩ S|, t(v))
+    con t(v) = ceil(d(v)/2) se thresholds non è dato.
+    """
+    cg, t, m = _capped_counts(G, S, thresholds)
+    return float(m.sum())
 
 
-def f1(G: nx.Graph, S: Set[int], degrees: Dict[int, int] = None, neighbors: Dict[int, set] = None) -> float:
+def f2(G: nx.Graph, S: Set[int], thresholds: np.ndarray = None) -> float:
     """
-    f1(S) = sum_v min(|N(v) ∩ S|, ceil(d(v)/2))
+    f2(S) = sum_v sum_{i=1}^{|N(v)∩S|} max(t(v) - i + 1, 0)
     """
-    if degrees is None:
-        degrees = dict(G.degree())
-    if neighbors is None:
-        neighbors = {v: set(G.neighbors(v)) for v in G}
-
-    total = 0.0
-    for v, d in degrees.items():
-        if d == 0:
-            continue
-        k = len(neighbors[v] & S)
-        total += min(k, math.ceil(d / 2))
-    return total
+    cg, t, m = _capped_counts(G, S, thresholds)
+    # somma in forma chiusa: m*t - m(m-1)/2 con m = min(k, t)
+    return float((m * t - m * (m - 1) // 2).sum())
 
 
-def f2(G: nx.Graph, S: Set[int], degrees: Dict[int, int] = None, neighbors: Dict[int, set] = None) -> float:
+def f3(G: nx.Graph, S: Set[int], thresholds: np.ndarray = None) -> float:
     """
-    f2(S) = sum_v sum_{i=1}^{|N(v)∩S|} max(ceil(d(v)/2) - i + 1, 0)
+    f3(S) = sum_v sum_{i=1}^{|N(v)∩S|} max((t(v) - i + 1)/(d(v) - i + 1), 0)
     """
-    if degrees is None:
-        degrees = dict(G.degree())
-    if neighbors is None:
-        neighbors = {v: set(G.neighbors(v)) for v in G}
+    cg, t, m = _capped_counts(G, S, thresholds)
+    idx = np.flatnonzero(m)
+    t, d, m = t[idx], cg.degree[idx], m[idx]
 
     total = 0.0
-    for v, d in degrees.items():
-        if d == 0:
-            continue
-        k = len(neighbors[v] & S)
-        t = math.ceil(d / 2)
-        for i in range(1, k + 1):
-            term = t - i + 1
-            if term > 0:
-                total += term
-            else:
-                break
+    i = 1
+    while idx.size:
+        total += ((t - i + 1) / (d - i + 1)).sum()
+        keep = m > i
+        t, d, m, idx = t[keep], d[keep], m[keep], idx[keep]
+        i += 1
     return total
 
 
-def f3(G: nx.Graph, S: Set[int], degrees: Dict[int, int] = None, neighbors: Dict[int, set] = None) -> float:
+def marginal_gains(G: nx.Graph, counts: np.ndarray, f_func, thresholds: np.ndarray = None,
+                   S: Set[int] = None, candidates: np.ndarray = None,
+                   cg: "threshold_engine.CompiledGraph" = None) -> np.ndarray:
     """
-    f3(S) = sum_v sum_{i=1}^{|N(v)∩S|} max((ceil(d(v)/2) - i + 1)/(d(v) - i + 1), 0)
+    Guadagno marginale f(S ∪ {v}) - f(S) di ogni nodo v.
+
+    Per f1, f2, f3 il calcolo è vettoriale: counts[u] = |N(u) ∩ S| e aggiungere v
+    incrementa counts[u] per ogni u in N(v), quindi il guadagno di v è la somma
+    sui vicini dell'incremento del termine di u:
+        f1: 1                    se counts[u] < t(u)
+        f2: t(u) - counts[u]     se counts[u] < t(u)
+        f3: (t(u) - counts[u]) / (d(u) - counts[u])   se counts[u] < t(u)
+
+    Qualsiasi altra funzione f(G, S, thresholds) viene valutata nodo per nodo:
+    serve S, e si possono limitare i nodi con candidates (maschera booleana);
+    gli altri hanno guadagno 0.
+
+    cg: grafo già compilato; chi chiama ad ogni passo lo passa per non
+    rivalidare la cache di compile_graph.
     """
-    if degrees is None:
-        degrees = dict(G.degree())
-    if neighbors is None:
-        neighbors = {v: set(G.neighbors(v)) for v in G}
+    if cg is None:
+        cg = threshold_engine.compile_graph(G)
+    if thresholds is None:
+        thresholds = threshold_engine.compute_thresholds(G)
 
-    total = 0.0
-    for v, d in degrees.items():
-        if d == 0:
-            continue
-        k = len(neighbors[v] & S)
-        for i in range(1, k + 1):
-            num = math.ceil(d / 2) - i + 1
-            den = d - i + 1
-            if num > 0 and den > 0:
-                total += num / den
-            else:
-                if den <= 0:
-                    break
-    return total
+    if f_func not in (f1, f2, f3):
+        if S is None:
+            raise ValueError(f"S è richiesto per la funzione obiettivo {f_func!r}")
+        gains = np.zeros(cg.n)
+        idx = np.flatnonzero(candidates) if candidates is not None else range(cg.n)
+        base = f_func(G, S, thresholds)
+        for i in idx:
+            gains[i] = f_func(G, S | {cg.nodes[i]}, thresholds) - base
+        return gains
+
+    open_ = counts < thresholds
+    residual = (thresholds - counts).astype(np.float64)
+
+    if f_func is f1:
+        g = open_.astype(np.float64)
+    elif f_func is f2:
+        g = np.where(open_, residual, 0.0)
+    else:
+        g = np.zeros(cg.n)
+        np.divide(residual, cg.degree - counts, out=g, where=open_ & (cg.degree > counts))
+
+    # somma di g sui vicini di ogni nodo (riga CSR)
+    return np.bincount(cg.rows, weights=g[cg.indices], minlength=cg.n)
+
+
+def _capped_counts(G, S, thresholds):
+    """Ritorna (grafo compilato, soglie, min(|N(v) ∩ S|, t(v)) per ogni nodo)."""
+    cg = threshold_engine.compile_graph(G)
+    if thresholds is None:
+        thresholds = threshold_engine.compute_thresholds(G)
+    m = np.minimum(cg.neighbor_counts(S), thresholds)
+    return cg, thresholds, m